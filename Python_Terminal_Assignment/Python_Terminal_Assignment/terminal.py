@@ -13,17 +13,64 @@ import psutil
 import time
 import json
 import re
+import stat
+import collections
+import itertools
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from datetime import datetime
 
+# One command-line segment: a double- or single-quoted string, a run of
+# unquoted non-space characters, or the spaces separating tokens
+_TOKEN_PART = re.compile(r'''"([^"]*)"?|'([^']*)'?|([^ "']+)|( +)''')
+
+# Output returned by exit. Callers test it with "is", so no real output
+# (a file that just says EXIT, say) can be taken for a request to quit.
+EXIT_SENTINEL = object()
+
+# What commands return: (is_error, output). The flag lets callers color or
+# report failures without scanning the output for keywords. The output is
+# text, except for exit's EXIT_SENTINEL, which callers must check for first.
+CommandResult = Tuple[bool, Union[str, object]]
+
+# A piece of cat or grep output; always text, so chunks can be joined
+TextChunk = Tuple[bool, str]
+
+# Seconds a cached ls/find listing stays valid
+_LISTING_TTL = 2.0
+
+# Listings longer than this many characters are not cached, so a big find
+# result isn't kept alive in memory
+_LISTING_MAX_SIZE = 1 << 16
+
+# Number of commands kept in the session history
+_HISTORY_SIZE = 1000
+
+# Chunk size, in characters, that streamed cat and grep output is yielded in
+_STREAM_CHUNK = 1 << 16
+
+# Maximum threads used to grep several files at once
+_GREP_WORKERS = 8
+
+# Whether rm -r can delete through directory file descriptors (POSIX only)
+_HAVE_FD_REMOVE = (
+    hasattr(os, 'fwalk')
+    and os.unlink in os.supports_dir_fd
+    and os.rmdir in os.supports_dir_fd
+)
+
 class PythonTerminal:
     def __init__(self):
         self.current_dir = os.getcwd()
-        self.command_history = []
+        self.command_history = collections.deque(maxlen=_HISTORY_SIZE)
         self.environment_vars = dict(os.environ)
         self.aliases = {}
         self.processes = {}
+        # Recent ls/find output keyed by (command, path, flags); cleared by any
+        # command that may change the filesystem
+        self._ls_cache: Dict[tuple, Tuple[float, str]] = {}
         
         # Initialize built-in commands
         self.builtin_commands = {
@@ -58,97 +105,149 @@ class PythonTerminal:
             'alias': self.cmd_alias,
             'unalias': self.cmd_unalias,
         }
+        # Command name -> handler, with aliases of builtins resolved to the
+        # handler itself so dispatch is a single lookup
+        self._dispatch: Dict[str, Any] = dict(self.builtin_commands)
+        # Builtin handler -> generator variant used by execute_command_iter
+        self._streaming = {
+            self.cmd_cat: self.iter_cat,
+            self.cmd_grep: self.iter_grep,
+        }
+        
+        # Values shown on every prompt or help call, computed once instead of
+        # per call; _user is refreshed when export sets USER or USERNAME
+        self._user = self._lookup_user()
+        self._host = platform.node()
+        self._help_str = f"Available commands:\n{', '.join(sorted(self.builtin_commands))}"
+        try:
+            self._boot_time: Optional[float] = psutil.boot_time()
+        except Exception:
+            self._boot_time = None
     
     def parse_command(self, command_line: str) -> List[str]:
         """Parse command line into tokens, handling quotes and escapes"""
         if not command_line.strip():
             return []
         
-        # Simple tokenization that handles quotes
+        # The regex walks the line in C, yielding quoted segments (an
+        # unterminated quote runs to the end of the line), bare runs and
+        # separating spaces; adjacent segments join into one token.
         tokens = []
-        current_token = ""
-        in_quotes = False
-        quote_char = None
-        
-        i = 0
-        while i < len(command_line):
-            char = command_line[i]
-            
-            if char in ['"', "'"] and not in_quotes:
-                in_quotes = True
-                quote_char = char
-            elif char == quote_char and in_quotes:
-                in_quotes = False
-                quote_char = None
-            elif char == ' ' and not in_quotes:
+        current_token = []
+        for double, single, bare, space in _TOKEN_PART.findall(command_line):
+            if space:
                 if current_token:
-                    tokens.append(current_token)
-                    current_token = ""
+                    tokens.append("".join(current_token))
+                    current_token = []
             else:
-                current_token += char
-            
-            i += 1
+                part = double or single or bare
+                if part:
+                    current_token.append(part)
         
         if current_token:
-            tokens.append(current_token)
+            tokens.append("".join(current_token))
         
         return tokens
     
-    def execute_command(self, command_line: str) -> str:
-        """Execute a command and return the output"""
+    def _start_command(self, command_line: str) -> List[str]:
+        """Record a command line in the history and return its tokens"""
+        # Add to history
+        if command_line.strip():
+            self.command_history.append(command_line)
+        
+        return self.parse_command(command_line)
+    
+    def _run_tokens(self, tokens: List[str]) -> CommandResult:
+        """Run an already parsed command"""
+        cmd = tokens[0]
+        args = tokens[1:]
+        
+        # Execute built-in commands (and aliases of them)
+        handler = self._dispatch.get(cmd)
+        if handler is not None:
+            return handler(args)
+        
+        # Execute external commands
+        return self.execute_external_command(self.aliases.get(cmd, cmd), args)
+    
+    def execute_command(self, command_line: str) -> CommandResult:
+        """Execute a command and return (is_error, output)"""
         try:
-            # Add to history
-            if command_line.strip():
-                self.command_history.append(command_line)
-            
-            tokens = self.parse_command(command_line)
+            tokens = self._start_command(command_line)
             if not tokens:
-                return ""
-            
-            cmd = tokens[0]
-            args = tokens[1:] if len(tokens) > 1 else []
+                return False, ""
             
-            # Check for aliases
-            if cmd in self.aliases:
-                cmd = self.aliases[cmd]
+            return self._run_tokens(tokens)
             
-            # Execute built-in commands
-            if cmd in self.builtin_commands:
-                return self.builtin_commands[cmd](args)
+        except Exception as e:
+            return True, f"Error: {str(e)}"
+    
+    def execute_command_iter(self, command_line: str) -> Iterator[CommandResult]:
+        """Execute a command, yielding (is_error, chunk) pieces of its output.
+        
+        cat and grep produce their output incrementally so large results never
+        have to be held in memory at once; every other command yields its
+        whole result as a single chunk.
+        """
+        try:
+            tokens = self._start_command(command_line)
+            if not tokens:
+                return
             
-            # Execute external commands
-            return self.execute_external_command(cmd, args)
+            streamer = self._streaming.get(self._dispatch.get(tokens[0]))
+            if streamer is None:
+                yield self._run_tokens(tokens)
+            else:
+                yield from streamer(tokens[1:])
             
         except Exception as e:
-            return f"Error: {str(e)}"
-    
-    def execute_external_command(self, cmd: str, args: List[str]) -> str:
+            yield True, f"Error: {str(e)}"
+    
+    def _join_chunks(self, chunks: Iterator[TextChunk]) -> CommandResult:
+        """Collect a streaming command's chunks into a single result"""
+        failed = False
+        parts = []
+        for is_error, chunk in chunks:
+            failed = failed or is_error
+            parts.append(chunk)
+        return failed, "".join(parts)
+    
+    def execute_external_command(self, cmd: str, args: List[str]) -> CommandResult:
         """Execute external system commands"""
         try:
             full_command = [cmd] + args
+            # subprocess only uses posix_spawn() instead of fork()+exec() when
+            # the executable is a resolved path, cwd is not set and close_fds is
+            # off. cd keeps the process cwd in sync with current_dir, and our own
+            # descriptors are non-inheritable, so both are safe to drop here.
+            cwd = None if os.getcwd() == self.current_dir else self.current_dir
             result = subprocess.run(
                 full_command,
-                cwd=self.current_dir,
+                executable=shutil.which(cmd),
+                cwd=cwd,
+                close_fds=False,
                 capture_output=True,
                 text=True,
                 timeout=30
             )
+            # External commands may touch the filesystem in ways we can't see
+            self._ls_cache.clear()
             
             output = result.stdout
             if result.stderr:
                 output += f"\nError: {result.stderr}"
             
-            return output.strip()
+            return result.returncode != 0 or bool(result.stderr), output.strip()
             
         except subprocess.TimeoutExpired:
-            return "Error: Command timed out"
+            return True, "Error: Command timed out"
         except FileNotFoundError:
-            return f"Error: Command '{cmd}' not found"
+            return True, f"Error: Command '{cmd}' not found"
         except Exception as e:
-            return f"Error: {str(e)}"
+            return True, f"Error: {str(e)}"
     
     # Built-in command implementations
-    def cmd_cd(self, args: List[str]) -> str:
+    def cmd_cd(self, args: List[str]) -> CommandResult:
         """Change directory"""
         if not args:
             target = os.path.expanduser("~")
@@ -167,17 +266,17 @@ class PythonTerminal:
                 self.environment_vars["OLDPWD"] = self.current_dir
                 self.current_dir = target
                 os.chdir(target)
-                return ""
+                return False, ""
             else:
-                return f"cd: {target}: No such file or directory"
+                return True, f"cd: {target}: No such file or directory"
         except Exception as e:
-            return f"cd: {str(e)}"
+            return True, f"cd: {str(e)}"
     
-    def cmd_pwd(self, args: List[str]) -> str:
+    def cmd_pwd(self, args: List[str]) -> CommandResult:
         """Print working directory"""
-        return self.current_dir
+        return False, self.current_dir
     
-    def cmd_ls(self, args: List[str]) -> str:
+    def cmd_ls(self, args: List[str]) -> CommandResult:
         """List directory contents"""
         show_hidden = "-a" in args or "--all" in args
         long_format = "-l" in args or "--long" in args
@@ -186,45 +285,73 @@ class PythonTerminal:
         paths = [arg for arg in args if not arg.startswith("-")]
         target_path = paths[0] if paths else self.current_dir
         
+        key = ("ls", os.path.abspath(target_path), show_hidden, long_format)
+        cached = self._cached_listing(key)
+        if cached is not None:
+            return False, cached
+        
         try:
             if not os.path.exists(target_path):
-                return f"ls: {target_path}: No such file or directory"
+                return True, f"ls: {target_path}: No such file or directory"
             
             if os.path.isfile(target_path):
-                items = [os.path.basename(target_path)]
-                target_path = os.path.dirname(target_path)
-            else:
-                items = os.listdir(target_path)
-            
-            if not show_hidden:
-                items = [item for item in items if not item.startswith('.')]
-            
-            items.sort()
-            
+                item = os.path.basename(target_path)
+                if not long_format:
+                    return False, self._store_listing(key, item)
+                return False, self._store_listing(key, self._format_long_entry(item, os.lstat(target_path)))
+
+            # The long format costs one lstat per entry (via DirEntry.stat)
+            # instead of a stat plus an isdir check
+            with os.scandir(target_path) as it:
+                entries = [e for e in it if show_hidden or not e.name.startswith('.')]
+
+            entries.sort(key=lambda e: e.name)
+
             if long_format:
                 result = []
-                for item in items:
-                    item_path = os.path.join(target_path, item)
+                for entry in entries:
                     try:
-                        stat = os.stat(item_path)
-                        size = stat.st_size
-                        mtime = datetime.fromtimestamp(stat.st_mtime).strftime("%b %d %H:%M")
-                        is_dir = "d" if os.path.isdir(item_path) else "-"
-                        permissions = oct(stat.st_mode)[-3:]
-                        result.append(f"{is_dir}rwxr-xr-x 1 user user {size:8} {mtime} {item}")
-                    except:
-                        result.append(f"?????????? ? ?    ?    ?        ? ? {item}")
-                return "\n".join(result)
+                        result.append(self._format_long_entry(
+                            entry.name, entry.stat(follow_symlinks=False)
+                        ))
+                    except OSError:
+                        result.append(f"?????????? ? ?    ?    ?        ? ? {entry.name}")
+                return False, self._store_listing(key, "\n".join(result))
             else:
-                return "  ".join(items)
+                return False, self._store_listing(key, "  ".join(entry.name for entry in entries))
                 
         except Exception as e:
-            return f"ls: {str(e)}"
-    
-    def cmd_mkdir(self, args: List[str]) -> str:
+            return True, f"ls: {str(e)}"
+
+    def _cached_listing(self, key: tuple) -> Optional[str]:
+        """Return a cached ls/find listing if it is still fresh"""
+        cached = self._ls_cache.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] < _LISTING_TTL:
+            return cached[1]
+        del self._ls_cache[key]
+        return None
+    
+    def _store_listing(self, key: tuple, output: str) -> str:
+        """Cache an ls/find listing, dropping expired entries, and return it"""
+        now = time.monotonic()
+        for stale in [k for k, (ts, _) in self._ls_cache.items() if now - ts >= _LISTING_TTL]:
+            del self._ls_cache[stale]
+        if len(output) <= _LISTING_MAX_SIZE:
+            self._ls_cache[key] = (now, output)
+        return output
+    
+    def _format_long_entry(self, name: str, st: os.stat_result) -> str:
+        """Format a single `ls -l` line from an already fetched stat result"""
+        permissions = stat.filemode(st.st_mode)
+        mtime = time.strftime("%b %d %H:%M", time.localtime(st.st_mtime))
+        return f"{permissions} 1 user user {st.st_size:8} {mtime} {name}"
+
+    def cmd_mkdir(self, args: List[str]) -> CommandResult:
         """Create directories"""
         if not args:
-            return "mkdir: missing operand"
+            return True, "mkdir: missing operand"
         
         create_parents = "-p" in args or "--parents" in args
         dirs = [arg for arg in args if not arg.startswith("-")]
@@ -241,12 +368,13 @@ class PythonTerminal:
             except Exception as e:
                 results.append(f"mkdir: {dir_name}: {str(e)}")
         
-        return "\n".join(results)
+        self._ls_cache.clear()
+        return bool(results), "\n".join(results)
     
-    def cmd_rmdir(self, args: List[str]) -> str:
+    def cmd_rmdir(self, args: List[str]) -> CommandResult:
         """Remove empty directories"""
         if not args:
-            return "rmdir: missing operand"
+            return True, "rmdir: missing operand"
         
         results = []
         for dir_name in args:
@@ -255,12 +383,13 @@ class PythonTerminal:
             except OSError as e:
                 results.append(f"rmdir: {dir_name}: {str(e)}")
         
-        return "\n".join(results)
+        self._ls_cache.clear()
+        return bool(results), "\n".join(results)
     
-    def cmd_rm(self, args: List[str]) -> str:
+    def cmd_rm(self, args: List[str]) -> CommandResult:
         """Remove files and directories"""
         if not args:
-            return "rm: missing operand"
+            return True, "rm: missing operand"
         
         recursive = "-r" in args or "-R" in args or "--recursive" in args
         force = "-f" in args or "--force" in args
@@ -271,7 +400,7 @@ class PythonTerminal:
             try:
                 if os.path.isdir(file_path):
                     if recursive:
-                        shutil.rmtree(file_path)
+                        self._remove_tree(file_path)
                     else:
                         results.append(f"rm: {file_path}: is a directory")
                 else:
@@ -282,18 +411,48 @@ class PythonTerminal:
             except Exception as e:
                 results.append(f"rm: {file_path}: {str(e)}")
         
-        return "\n".join(results)
+        self._ls_cache.clear()
+        return bool(results), "\n".join(results)
     
-    def cmd_cp(self, args: List[str]) -> str:
+    def _remove_tree(self, path: str) -> None:
+        """Recursively delete a directory tree"""
+        if not _HAVE_FD_REMOVE or os.path.islink(path):
+            shutil.rmtree(path)
+            return
+        
+        def fail(err: OSError) -> None:
+            # Without this fwalk silently skips directories it can't open
+            raise err
+        
+        # Bottom-up walk that unlinks each entry relative to its parent's
+        # descriptor, so the kernel never re-resolves the full path
+        try:
+            for root, dirs, files, rootfd in os.fwalk(path, topdown=False, onerror=fail):
+                for name in files:
+                    os.unlink(name, dir_fd=rootfd)
+                for name in dirs:
+                    try:
+                        os.rmdir(name, dir_fd=rootfd)
+                    except NotADirectoryError:
+                        # fwalk lists symlinks to directories under dirs
+                        os.unlink(name, dir_fd=rootfd)
+        except OSError:
+            # Let rmtree remove whatever it still can and raise the error
+            # with the path the way it always has
+            shutil.rmtree(path)
+            return
+        os.rmdir(path)
+    
+    def cmd_cp(self, args: List[str]) -> CommandResult:
         """Copy files and directories"""
         if len(args) < 2:
-            return "cp: missing operand"
+            return True, "cp: missing operand"
         
         recursive = "-r" in args or "-R" in args or "--recursive" in args
         files = [arg for arg in args if not arg.startswith("-")]
         
         if len(files) < 2:
-            return "cp: missing destination"
+            return True, "cp: missing destination"
         
         source_files = files[:-1]
         destination = files[-1]
@@ -315,45 +474,54 @@ class PythonTerminal:
             except Exception as e:
                 results.append(f"cp: {str(e)}")
         
-        return "\n".join(results)
+        self._ls_cache.clear()
+        return bool(results), "\n".join(results)
     
-    def cmd_mv(self, args: List[str]) -> str:
+    def cmd_mv(self, args: List[str]) -> CommandResult:
         """Move/rename files and directories"""
         if len(args) < 2:
-            return "mv: missing operand"
+            return True, "mv: missing operand"
         
         source = args[0]
         destination = args[1]
         
         try:
             shutil.move(source, destination)
-            return ""
+            self._ls_cache.clear()
+            return False, ""
         except Exception as e:
-            return f"mv: {str(e)}"
+            return True, f"mv: {str(e)}"
     
-    def cmd_cat(self, args: List[str]) -> str:
+    def cmd_cat(self, args: List[str]) -> CommandResult:
         """Display file contents"""
+        return self._join_chunks(self.iter_cat(args))
+    
+    def iter_cat(self, args: List[str]) -> Iterator[TextChunk]:
+        """Display file contents in fixed-size chunks"""
         if not args:
-            return "cat: missing operand"
+            yield True, "cat: missing operand"
+            return
         
-        results = []
-        for file_path in args:
+        for i, file_path in enumerate(args):
+            if i:
+                yield False, "\n"
             try:
+                # Text mode decodes incrementally, so chunk boundaries never
+                # split a character or a \r\n pair
                 with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    results.append(f.read())
+                    for chunk in iter(lambda: f.read(_STREAM_CHUNK), ""):
+                        yield False, chunk
             except Exception as e:
-                results.append(f"cat: {file_path}: {str(e)}")
-        
-        return "\n".join(results)
+                yield True, f"cat: {file_path}: {str(e)}"
     
-    def cmd_echo(self, args: List[str]) -> str:
+    def cmd_echo(self, args: List[str]) -> CommandResult:
         """Display text"""
-        return " ".join(args)
+        return False, " ".join(args)
     
-    def cmd_touch(self, args: List[str]) -> str:
+    def cmd_touch(self, args: List[str]) -> CommandResult:
         """Create empty files or update timestamps"""
         if not args:
-            return "touch: missing operand"
+            return True, "touch: missing operand"
         
         results = []
         for file_path in args:
@@ -362,9 +530,10 @@ class PythonTerminal:
             except Exception as e:
                 results.append(f"touch: {file_path}: {str(e)}")
         
-        return "\n".join(results)
+        self._ls_cache.clear()
+        return bool(results), "\n".join(results)
     
-    def cmd_find(self, args: List[str]) -> str:
+    def cmd_find(self, args: List[str]) -> CommandResult:
         """Find files and directories"""
         if not args:
             path = self.current_dir
@@ -380,56 +549,145 @@ class PythonTerminal:
             path = args[0]
             pattern = args[1]
         
+        # Results are printed relative to path as typed, so key on that
+        # spelling (and the directory it is relative to), not its absolute form
+        key = ("find", self.current_dir, path, pattern)
+        cached = self._cached_listing(key)
+        if cached is not None:
+            return False, cached
+        
+        # Glob patterns are compiled once into a regex; plain words keep the
+        # substring match users already rely on
+        if pattern == "*":
+            matches = None
+        elif any(c in pattern for c in "*?["):
+            matches = re.compile(fnmatch.translate(pattern)).match
+        else:
+            matches = lambda name: pattern in name
         results = []
+        # Depth-first walk over DirEntry objects in os.walk's order: each
+        # directory lists its subdirectories, then its files. is_dir() and
+        # is_symlink() use the d_type from the scan, so only symlinks cost a
+        # stat; like os.walk, symlinked directories are listed but not entered.
+        stack = [path]
         try:
-            for root, dirs, files in os.walk(path):
-                for name in dirs + files:
-                    if pattern == "*" or pattern in name:
-                        results.append(os.path.join(root, name))
+            while stack:
+                dirs = []
+                files = []
+                try:
+                    with os.scandir(stack.pop()) as it:
+                        for entry in it:
+                            try:
+                                is_dir = entry.is_dir()
+                            except OSError:
+                                is_dir = False
+                            (dirs if is_dir else files).append(entry)
+                except OSError:
+                    # Unreadable directories are skipped, as os.walk did
+                    continue
+                for entry in itertools.chain(dirs, files):
+                    if matches is None or matches(entry.name):
+                        results.append(entry.path)
+                stack.extend(reversed([entry.path for entry in dirs if not entry.is_symlink()]))
         except Exception as e:
-            return f"find: {str(e)}"
+            return True, f"find: {str(e)}"
         
-        return "\n".join(results)
+        return False, self._store_listing(key, "\n".join(results))
     
-    def cmd_grep(self, args: List[str]) -> str:
+    def cmd_grep(self, args: List[str]) -> CommandResult:
         """Search for patterns in files"""
+        return self._join_chunks(self.iter_grep(args))
+    
+    def iter_grep(self, args: List[str]) -> Iterator[TextChunk]:
+        """Search for patterns in files, yielding matches in batches"""
         if len(args) < 2:
-            return "grep: missing operand"
+            yield True, "grep: missing operand"
+            return
         
         pattern = args[0]
         files = args[1:]
         
-        results = []
-        for file_path in files:
+        try:
+            # Compiled once for every file rather than looked up per line
+            regex = re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            yield True, f"grep: {pattern}: {str(e)}"
+            return
+        
+        def scan(file_path: str) -> Iterator[TextChunk]:
             try:
-                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    for line_num, line in enumerate(f, 1):
-                        if re.search(pattern, line, re.IGNORECASE):
-                            results.append(f"{file_path}:{line_num}:{line.strip()}")
+                for line in self._grep_lines(regex, file_path):
+                    yield False, line
             except Exception as e:
-                results.append(f"grep: {file_path}: {str(e)}")
+                yield True, f"grep: {file_path}: {str(e)}"
+        
+        # File reads release the GIL, so the I/O waits of several files can
+        # overlap; map() keeps the results in argument order
+        if len(files) > 1:
+            with ThreadPoolExecutor(max_workers=min(_GREP_WORKERS, len(files))) as pool:
+                per_file = pool.map(lambda file_path: list(scan(file_path)), files)
+                yield from self._batch_lines(itertools.chain.from_iterable(per_file))
+        else:
+            yield from self._batch_lines(scan(files[0]))
+    
+    def _batch_lines(self, lines: Iterator[TextChunk]) -> Iterator[TextChunk]:
+        """Join (is_error, line) pairs into chunks of about _STREAM_CHUNK
+        characters, keeping error lines in chunks of their own"""
+        batch: List[str] = []
+        size = 0
+        sep = ""
+        for is_error, line in lines:
+            if not is_error:
+                batch.append(line)
+                size += len(line) + 1
+                if size < _STREAM_CHUNK:
+                    continue
+            if batch:
+                yield False, sep + "\n".join(batch)
+                sep = "\n"
+                batch = []
+                size = 0
+            if is_error:
+                yield True, sep + line
+                sep = "\n"
+        if batch:
+            yield False, sep + "\n".join(batch)
+    
+    def _grep_lines(self, regex: re.Pattern, file_path: str) -> Iterator[str]:
+        """Yield the formatted matching lines of a single file"""
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line_num, line in enumerate(f, 1):
+                if regex.search(line):
+                    yield f"{file_path}:{line_num}:{line.strip()}"
+    
+    def _sample_processes(self) -> List[Dict[str, Any]]:
+        """Collect pid/name/cpu/mem info for ps and top"""
+        # process_iter() keeps its own pid -> Process cache between calls,
+        # so cpu_percent is measured since the previous sample, and it
+        # detects reused PIDs
+        processes = []
+        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
+            try:
+                processes.append(proc.info)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
         
-        return "\n".join(results)
+        return processes
     
-    def cmd_ps(self, args: List[str]) -> str:
+    def cmd_ps(self, args: List[str]) -> CommandResult:
         """List running processes"""
         try:
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                try:
-                    processes.append(proc.info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
+            processes = self._sample_processes()
             
             result = ["PID\tNAME\t\tCPU%\tMEM%"]
             for proc in processes[:20]:  # Limit to first 20 processes
                 result.append(f"{proc['pid']}\t{proc['name'][:15]:<15}\t{proc['cpu_percent']:.1f}\t{proc['memory_percent']:.1f}")
             
-            return "\n".join(result)
+            return False, "\n".join(result)
         except Exception as e:
-            return f"ps: {str(e)}"
+            return True, f"ps: {str(e)}"
     
-    def cmd_top(self, args: List[str]) -> str:
+    def cmd_top(self, args: List[str]) -> CommandResult:
         """Display system resource usage"""
         try:
             cpu_percent = psutil.cpu_percent(interval=1)
@@ -445,12 +703,7 @@ class PythonTerminal:
                 "Top Processes:"
             ]
             
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                try:
-                    processes.append(proc.info)
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
+            processes = self._sample_processes()
             
             # Sort by CPU usage
             processes.sort(key=lambda x: x['cpu_percent'] or 0, reverse=True)
@@ -459,94 +712,103 @@ class PythonTerminal:
             for proc in processes[:10]:
                 result.append(f"{proc['pid']}\t{proc['name'][:15]:<15}\t{proc['cpu_percent'] or 0:.1f}\t{proc['memory_percent'] or 0:.1f}")
             
-            return "\n".join(result)
+            return False, "\n".join(result)
         except Exception as e:
-            return f"top: {str(e)}"
+            return True, f"top: {str(e)}"
     
-    def cmd_kill(self, args: List[str]) -> str:
+    def cmd_kill(self, args: List[str]) -> CommandResult:
         """Kill a process by PID"""
         if not args:
-            return "kill: missing operand"
+            return True, "kill: missing operand"
         
         try:
             pid = int(args[0])
             process = psutil.Process(pid)
             process.terminate()
-            return f"Process {pid} terminated"
+            return False, f"Process {pid} terminated"
         except ValueError:
-            return "kill: invalid PID"
+            return True, "kill: invalid PID"
         except psutil.NoSuchProcess:
-            return f"kill: no process with PID {args[0]}"
+            return True, f"kill: no process with PID {args[0]}"
         except psutil.AccessDenied:
-            return f"kill: permission denied for PID {args[0]}"
+            return True, f"kill: permission denied for PID {args[0]}"
         except Exception as e:
-            return f"kill: {str(e)}"
+            return True, f"kill: {str(e)}"
     
-    def cmd_env(self, args: List[str]) -> str:
+    def cmd_env(self, args: List[str]) -> CommandResult:
         """Display environment variables"""
         if not args:
-            return "\n".join([f"{k}={v}" for k, v in self.environment_vars.items()])
+            return False, "\n".join([f"{k}={v}" for k, v in self.environment_vars.items()])
         else:
             var_name = args[0]
-            return self.environment_vars.get(var_name, f"env: {var_name}: not found")
+            if var_name not in self.environment_vars:
+                return True, f"env: {var_name}: not found"
+            return False, self.environment_vars[var_name]
     
-    def cmd_export(self, args: List[str]) -> str:
+    def cmd_export(self, args: List[str]) -> CommandResult:
         """Set environment variables"""
         if not args:
-            return "export: missing operand"
+            return True, "export: missing operand"
         
         for arg in args:
             if "=" in arg:
                 key, value = arg.split("=", 1)
                 self.environment_vars[key] = value
                 os.environ[key] = value
+                if key in ('USER', 'USERNAME'):
+                    self._user = self._lookup_user()
             else:
-                return f"export: invalid format '{arg}'"
+                return True, f"export: invalid format '{arg}'"
         
-        return ""
+        return False, ""
     
-    def cmd_history(self, args: List[str]) -> str:
+    def cmd_history(self, args: List[str]) -> CommandResult:
         """Show command history"""
         if not self.command_history:
-            return ""
+            return False, ""
         
+        # Show last 20 commands, taken from the right end of the deque
+        recent = list(itertools.islice(reversed(self.command_history), 20))
         result = []
-        for i, cmd in enumerate(self.command_history[-20:], 1):  # Show last 20 commands
+        for i, cmd in enumerate(reversed(recent), 1):
             result.append(f"{i:3} {cmd}")
         
-        return "\n".join(result)
+        return False, "\n".join(result)
     
-    def cmd_clear(self, args: List[str]) -> str:
+    def cmd_clear(self, args: List[str]) -> CommandResult:
         """Clear the screen"""
-        return "\033[2J\033[H"  # ANSI escape codes for clear screen
+        return False, "\033[2J\033[H"  # ANSI escape codes for clear screen
     
-    def cmd_exit(self, args: List[str]) -> str:
+    def cmd_exit(self, args: List[str]) -> CommandResult:
         """Exit the terminal"""
-        return "EXIT"
+        return False, EXIT_SENTINEL
     
-    def cmd_help(self, args: List[str]) -> str:
+    def cmd_help(self, args: List[str]) -> CommandResult:
         """Show available commands"""
-        commands = sorted(self.builtin_commands.keys())
-        return f"Available commands:\n{', '.join(commands)}"
+        return False, self._help_str
     
-    def cmd_whoami(self, args: List[str]) -> str:
-        """Show current user"""
+    def _lookup_user(self) -> str:
+        """Read the user name from the environment"""
         return os.getenv('USER', os.getenv('USERNAME', 'user'))
     
-    def cmd_date(self, args: List[str]) -> str:
+    def cmd_whoami(self, args: List[str]) -> CommandResult:
+        """Show current user"""
+        return False, self._user
+    
+    def cmd_date(self, args: List[str]) -> CommandResult:
         """Show current date and time"""
-        return datetime.now().strftime("%a %b %d %H:%M:%S %Z %Y")
+        return False, datetime.now().strftime("%a %b %d %H:%M:%S %Z %Y")
     
-    def cmd_uptime(self, args: List[str]) -> str:
+    def cmd_uptime(self, args: List[str]) -> CommandResult:
         """Show system uptime"""
-        try:
-            boot_time = datetime.fromtimestamp(psutil.boot_time())
-            uptime = datetime.now() - boot_time
-            return f"up {uptime.days} days, {uptime.seconds//3600} hours, {(uptime.seconds//60)%60} minutes"
-        except:
-            return "uptime: unable to get system uptime"
+        if self._boot_time is None:
+            return True, "uptime: unable to get system uptime"
+        
+        days, rest = divmod(int(time.time() - self._boot_time), 86400)
+        hours, rest = divmod(rest, 3600)
+        return False, f"up {days} days, {hours} hours, {rest // 60} minutes"
     
-    def cmd_df(self, args: List[str]) -> str:
+    def cmd_df(self, args: List[str]) -> CommandResult:
         """Show disk space usage"""
         try:
             disk = psutil.disk_usage('/')
@@ -554,11 +816,11 @@ class PythonTerminal:
             used_gb = disk.used / (1024**3)
             free_gb = disk.free / (1024**3)
             
-            return f"Filesystem\tSize\tUsed\tAvail\tUse%\n/\t\t{total_gb:.1f}G\t{used_gb:.1f}G\t{free_gb:.1f}G\t{disk.percent:.0f}%"
+            return False, f"Filesystem\tSize\tUsed\tAvail\tUse%\n/\t\t{total_gb:.1f}G\t{used_gb:.1f}G\t{free_gb:.1f}G\t{disk.percent:.0f}%"
         except Exception as e:
-            return f"df: {str(e)}"
+            return True, f"df: {str(e)}"
     
-    def cmd_free(self, args: List[str]) -> str:
+    def cmd_free(self, args: List[str]) -> CommandResult:
         """Show memory usage"""
         try:
             memory = psutil.virtual_memory()
@@ -578,43 +840,54 @@ class PythonTerminal:
                 f"Swap:\t\t{swap_total_mb:.0f}MB\t\t{swap_used_mb:.0f}MB\t\t{swap_free_mb:.0f}MB"
             ]
             
-            return "\n".join(result)
+            return False, "\n".join(result)
         except Exception as e:
-            return f"free: {str(e)}"
+            return True, f"free: {str(e)}"
     
-    def cmd_alias(self, args: List[str]) -> str:
+    def cmd_alias(self, args: List[str]) -> CommandResult:
         """Create command aliases"""
         if not args:
-            return "\n".join([f"{k}='{v}'" for k, v in self.aliases.items()])
+            return False, "\n".join([f"{k}='{v}'" for k, v in self.aliases.items()])
         
         for arg in args:
             if "=" in arg:
                 alias, command = arg.split("=", 1)
                 self.aliases[alias] = command.strip("'\"")
+                self._rebuild_dispatch()
             else:
-                return f"alias: invalid format '{arg}'"
+                return True, f"alias: invalid format '{arg}'"
         
-        return ""
+        return False, ""
+    
+    def _rebuild_dispatch(self) -> None:
+        """Recompute the dispatch table after the alias table changes"""
+        dispatch = dict(self.builtin_commands)
+        for alias, command in self.aliases.items():
+            if command in self.builtin_commands:
+                dispatch[alias] = self.builtin_commands[command]
+            else:
+                # An alias for an external command shadows any builtin name
+                dispatch.pop(alias, None)
+        self._dispatch = dispatch
     
-    def cmd_unalias(self, args: List[str]) -> str:
+    def cmd_unalias(self, args: List[str]) -> CommandResult:
         """Remove command aliases"""
         if not args:
-            return "unalias: missing operand"
+            return True, "unalias: missing operand"
         
         for alias in args:
             if alias in self.aliases:
                 del self.aliases[alias]
+                self._rebuild_dispatch()
             else:
-                return f"unalias: {alias}: not found"
+                return True, f"unalias: {alias}: not found"
         
-        return ""
+        return False, ""
     
     def get_prompt(self) -> str:
         """Generate command prompt"""
-        user = self.cmd_whoami([])
-        hostname = platform.node()
         current_dir = os.path.basename(self.current_dir) or self.current_dir
-        return f"{user}@{hostname}:{current_dir}$ "
+        return f"{self._user}@{self._host}:{current_dir}$ "
     
     def run(self):
         """Main terminal loop"""
@@ -630,9 +903,9 @@ class PythonTerminal:
                 if not command:
                     continue
                 
-                output = self.execute_command(command)
+                _, output = self.execute_command(command)
                 
-                if output == "EXIT":
+                if output is EXIT_SENTINEL:
                     print("Goodbye!")
                     break
                 elif output:
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import scrolledtext
-from terminal import PythonTerminal
+from terminal import EXIT_SENTINEL, PythonTerminal
+
+# Let Tk redraw after this many streamed output chunks
+REFRESH_EVERY = 8
 
 class TerminalUI:
     def __init__(self, master):
@@ -20,6 +23,10 @@ class TerminalUI:
         self.output_box.pack(expand=True, fill='both')
         self.output_box.configure(state='disabled')
 
+        # One tag per output color, configured once and applied on insert
+        for color in ("white", "green", "blue", "red"):
+            self.output_box.tag_config(color, foreground=color)
+
         # Input box
         self.entry = tk.Entry(master, font=("Consolas", 11), bg="black", fg="white", insertbackground="white")
         self.entry.pack(fill='x')
@@ -59,18 +66,18 @@ class TerminalUI:
         # Display command in output
         self.append_output(command, color="white", end="\n")
 
-        # Execute the command
-        output = self.terminal.execute_command(command)
-
-        if output == "EXIT":
-            self.append_output("Goodbye!", color="red")
-            self.master.quit()
-        else:
+        # Execute the command, appending its output as it is produced
+        for i, (is_error, chunk) in enumerate(self.terminal.execute_command_iter(command)):
+            if chunk is EXIT_SENTINEL:
+                self.append_output("Goodbye!", color="red")
+                self.master.quit()
+                break
             # Color errors red
-            if "Error:" in output or "No such file" in output or "invalid" in output:
-                self.append_output(output, color="red")
-            else:
-                self.append_output(output, color="white")
+            self.append_output(chunk, color="red" if is_error else "white", end="")
+            if i % REFRESH_EVERY == REFRESH_EVERY - 1:
+                self.master.update_idletasks()
+        else:
+            self.append_output("")
 
         self.entry.delete(0, tk.END)
         self.show_prompt()
@@ -78,9 +85,7 @@ class TerminalUI:
     def append_output(self, text, color="white", end="\n"):
         """Append text to the output box with color"""
         self.output_box.configure(state='normal')
-        self.output_box.insert(tk.END, text + end)
-        self.output_box.tag_add("color", "end-1c linestart", "end-1c lineend")
-        self.output_box.tag_config("color", foreground=color)
+        self.output_box.insert(tk.END, text + end, color)
         self.output_box.see(tk.END)
         self.output_box.configure(state='disabled')
 
@@ -1,123 +1,36 @@
-# import tkinter as tk
-# from tkinter import scrolledtext
-# from terminal import PythonTerminal
-
-# class TerminalUI:
-#     def __init__(self, master):
-#         self.master = master
-#         master.title("Python Terminal UI")
-#         master.geometry("900x500")
-#         master.configure(bg="black")
-
-#         # Backend terminal
-#         self.terminal = PythonTerminal()
-
-#         # Scrollable output
-#         self.output_box = scrolledtext.ScrolledText(
-#             master, wrap=tk.WORD, font=("Consolas", 11),
-#             bg="black", fg="white", insertbackground="white"
-#         )
-#         self.output_box.pack(expand=True, fill='both')
-#         self.output_box.configure(state='disabled')
-
-#         # Input box
-#         self.entry = tk.Entry(master, font=("Consolas", 11), bg="black", fg="white", insertbackground="white")
-#         self.entry.pack(fill='x')
-#         self.entry.bind("<Return>", self.run_command)
-#         self.entry.bind("<Up>", self.history_up)
-#         self.entry.bind("<Down>", self.history_down)
-#         self.entry.focus()
-
-#         # Command history
-#         self.history = []
-#         self.history_index = -1
-
-#         # Show initial prompt
-#         self.show_prompt()
-
-#     def show_prompt(self):
-#         """Display the dynamic prompt"""
-#         prompt_text = self.terminal.get_prompt()
-#         if ':' in prompt_text:
-#             user_host, current_dir = prompt_text.split(':', 1)
-#         else:
-#             user_host, current_dir = prompt_text, ""
-
-#         self.append_output(user_host + ":", color="green", end="")
-#         self.append_output(current_dir + "$ ", color="blue", end="")
-
-#     def run_command(self, event=None):
-#         command = self.entry.get().strip()
-#         if not command:
-#             self.show_prompt()
-#             return
-
-#         # Add to history
-#         self.history.append(command)
-#         self.history_index = len(self.history)
-
-#         # Display command in output
-#         self.append_output(command, color="white", end="\n")
-
-#         # Execute the command
-#         output = self.terminal.execute_command(command)
-
-#         if output == "EXIT":
-#             self.append_output("Goodbye!", color="red")
-#             self.master.quit()
-#         else:
-#             # Color errors red
-#             if "Error:" in output or "No such file" in output or "invalid" in output:
-#                 self.append_output(output, color="red")
-#             else:
-#                 self.append_output(output, color="white")
-
-#         self.entry.delete(0, tk.END)
-#         self.show_prompt()
-
-#     def append_output(self, text, color="white", end="\n"):
-#         """Append text to the output box with color"""
-#         self.output_box.configure(state='normal')
-#         self.output_box.insert(tk.END, text + end)
-#         self.output_box.tag_add("color", "end-1c linestart", "end-1c lineend")
-#         self.output_box.tag_config("color", foreground=color)
-#         self.output_box.see(tk.END)
-#         self.output_box.configure(state='disabled')
-
-#     def history_up(self, event):
-#         if self.history:
-#             self.history_index = max(0, self.history_index - 1)
-#             self.entry.delete(0, tk.END)
-#             self.entry.insert(0, self.history[self.history_index])
-
-#     def history_down(self, event):
-#         if self.history:
-#             self.history_index = min(len(self.history) - 1, self.history_index + 1)
-#             self.entry.delete(0, tk.END)
-#             if self.history_index < len(self.history):
-#                 self.entry.insert(0, self.history[self.history_index])
-#             else:
-#                 self.entry.insert(0, "")
-
-# def main():
-#     root = tk.Tk()
-#     app = TerminalUI(root)
-#     root.mainloop()
-
-# if __name__ == "__main__":
-#     main()
-
+import collections
+import queue
+import re
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import ttk
+from types import MappingProxyType
+# CHANGE: The import now correctly points to the renamed engine file
+from terminal_engine import PythonTerminal
 
+# Number of entered commands kept for Up/Down navigation
+MAX_HISTORY = 1000
 
+# Oldest output lines are dropped once the scrollback exceeds this many
+MAX_SCROLLBACK_LINES = 5000
 
+# Output containing any of these markers is shown as an error
+ERROR_RE = re.compile(r"Error:|No such file|invalid")
 
+# Characters outside the BMP, which Tk 8.x stores as UTF-16 surrogate pairs
+# and so counts as two index positions
+NON_BMP_RE = re.compile("[\U00010000-\U0010FFFF]")
+NON_BMP_EXTRA = 1 if tk.TkVersion < 9.0 else 0
 
+# Output longer than this is written a slice at a time across idle ticks
+STREAM_THRESHOLD = 64 * 1024
+STREAM_CHUNK_SIZE = 16 * 1024
 
+# Typing pause, in ms, before the input box height is rechecked
+RESIZE_DELAY_MS = 30
 
-import tkinter as tk
-from tkinter import scrolledtext
-# CHANGE: The import now correctly points to the renamed engine file
-from terminal_engine import PythonTerminal
+# How often, in ms, the Tk thread checks whether a running command finished
+RESULT_POLL_MS = 20
 
 # Define color themes
 THEMES = {
@@ -142,6 +55,8 @@ THEMES = {
         "red": "#FF0000"
     }
 }
+# Read-only, so a theme can't be altered by accident at runtime
+THEMES = MappingProxyType({name: MappingProxyType(colors) for name, colors in THEMES.items()})
 
 class TerminalUI:
     def __init__(self, master):
@@ -151,18 +66,37 @@ class TerminalUI:
 
         self.terminal = PythonTerminal()
         self.current_theme = "dark"
+        self._ui_commands = {"theme": self.toggle_theme, "wrap": self.toggle_wrap}
 
         self.paned_window = tk.PanedWindow(
             master, orient=tk.VERTICAL, sashrelief=tk.RAISED, sashwidth=5
         )
         self.paned_window.pack(expand=True, fill='both')
 
-        self.output_box = scrolledtext.ScrolledText(
-            self.paned_window, wrap=tk.WORD, font=("Consolas", 11),
+        # A plain Text rather than ScrolledText, unwrapped by default since
+        # word-wrapping long lines is Text's slow path; "wrap" toggles it
+        output_frame = tk.Frame(self.paned_window)
+        self.output_box = tk.Text(
+            output_frame, wrap=tk.NONE, font=("Consolas", 11),
             relief="flat", borderwidth=0
         )
-        self.output_box.configure(state='disabled')
-        self.paned_window.add(self.output_box, minsize=100)
+        y_scroll = ttk.Scrollbar(output_frame, orient=tk.VERTICAL, command=self.output_box.yview)
+        x_scroll = ttk.Scrollbar(output_frame, orient=tk.HORIZONTAL, command=self.output_box.xview)
+        self.output_box.configure(
+            yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set, state='disabled'
+        )
+        self.output_box.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        output_frame.rowconfigure(0, weight=1)
+        output_frame.columnconfigure(0, weight=1)
+        self.paned_window.add(output_frame, minsize=100)
+
+        # Output box methods _flush_output calls on every write, bound once
+        self._ob_insert = self.output_box.insert
+        self._ob_tag_add = self.output_box.tag_add
+        self._ob_see = self.output_box.see
+        self._ob_config = self.output_box.configure
 
         input_frame = tk.Frame(self.paned_window)
         
@@ -183,30 +117,56 @@ class TerminalUI:
 
         self.paned_window.add(input_frame, minsize=45, stretch="never")
         
-        self.history = []
+        # Bounded so long sessions don't grow without limit; Up/Down browse
+        # near the right end, where deque indexing is cheap
+        self.history = collections.deque(maxlen=MAX_HISTORY)
         self.history_index = -1
 
+        # Position of the end of the output text ("end-1c"), advanced as text
+        # is appended so neither tagging nor the scrollback cap asks Tk for it
+        self._end_line = 1
+        self._end_col = 0
+
+        # (text, tag) writes waiting for the next idle flush
+        self._pending = []
+        self._flush_scheduled = False
+
+        # One-slot cache of the last prompt string and its (user_host, dir) split
+        self._last_prompt_raw = None
+        self._last_prompt_parts = None
+
+        # Commands run one at a time on a worker thread so a slow one doesn't
+        # freeze the window. The worker only puts the finished future on a
+        # queue; the Tk thread polls it, since Tk must not be called from
+        # other threads.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._results = queue.Queue()
+        self._future = None
+        self._command_running = False
+        master.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Pending after() id for the debounced input height check
+        self._resize_job = None
+
         self.apply_theme(self.current_theme)
         self.show_prompt()
 
     def apply_theme(self, theme_name):
         """Applies the selected color theme to all UI elements."""
         theme = THEMES[theme_name]
-        self.master.config(bg=theme["bg"])
+        bg, fg, insert_bg = theme["bg"], theme["fg"], theme["insert_bg"]
+        self.master.config(bg=bg)
         self.paned_window.config(bg=theme["sash_bg"])
         
-        self.output_box.config(
-            bg=theme["bg"], fg=theme["fg"], insertbackground=theme["insert_bg"]
-        )
+        self.output_box.master.config(bg=bg)
+        self.output_box.config(bg=bg, fg=fg, insertbackground=insert_bg)
         self.output_box.tag_config("green", foreground=theme["green"])
         self.output_box.tag_config("blue", foreground=theme["blue"])
         self.output_box.tag_config("red", foreground=theme["red"])
-        self.output_box.tag_config("white", foreground=theme["fg"])
+        # No "white" tag: plain output is never tagged and takes fg above
         
-        self.input_box.master.config(bg=theme["bg"])
-        self.input_box.config(
-            bg=theme["input_bg"], fg=theme["fg"], insertbackground=theme["insert_bg"]
-        )
+        self.input_box.master.config(bg=bg)
+        self.input_box.config(bg=theme["input_bg"], fg=fg, insertbackground=insert_bg)
 
     def toggle_theme(self):
         """Switches between dark and light themes."""
@@ -214,10 +174,28 @@ class TerminalUI:
         self.apply_theme(self.current_theme)
         return f"Theme changed to {self.current_theme} mode."
 
+    def toggle_wrap(self):
+        """Switches output line wrapping on or off."""
+        wrap = tk.WORD if self.output_box.cget("wrap") == tk.NONE else tk.NONE
+        self.output_box.config(wrap=wrap)
+        return f"Line wrapping turned {'off' if wrap == tk.NONE else 'on'}."
+
     def adjust_input_height(self, event=None):
+        """Schedule an input height check, collapsing a burst of keystrokes
+        into a single one."""
+        if self._resize_job:
+            self.master.after_cancel(self._resize_job)
+        self._resize_job = self.master.after(RESIZE_DELAY_MS, self._do_adjust_height)
+
+    def _do_adjust_height(self):
         """Auto-adjusts the input box height based on the number of lines."""
-        current_lines = int(self.input_box.index('end-1c').split('.')[0])
-        new_height = max(1, min(current_lines, 10))
+        self._resize_job = None
+        text = self.input_box.get("1.0", "end-1c")
+        # Single-line input is the common case; skip the count for it
+        if "\n" not in text:
+            new_height = 1
+        else:
+            new_height = max(1, min(text.count("\n") + 1, 10))
         
         if self.input_box.cget("height") != new_height:
             self.input_box.config(height=new_height)
@@ -231,11 +209,14 @@ class TerminalUI:
             self.append_output(prompt_text, tag="white", end="")
             return
 
-        # Handle shell prompt
-        if ':' in prompt_text:
-            user_host, current_dir = prompt_text.split(':', 1)
-        else:
-            user_host, current_dir = prompt_text, ""
+        # Handle shell prompt; it only changes on cd, so reuse the last split
+        if prompt_text != self._last_prompt_raw:
+            if ':' in prompt_text:
+                self._last_prompt_parts = tuple(prompt_text.split(':', 1))
+            else:
+                self._last_prompt_parts = (prompt_text, "")
+            self._last_prompt_raw = prompt_text
+        user_host, current_dir = self._last_prompt_parts
         self.append_output(user_host + ":", tag="green", end="")
         self.append_output(current_dir, tag="blue", end="")
 
@@ -249,56 +230,154 @@ class TerminalUI:
         return "break"
 
     def run_command(self, event=None):
+        if self._command_running:
+            return
+
         command = self.input_box.get("1.0", "end-1c").strip()
+        mode = self.terminal.mode
+        append = self.append_output
         
         # Don't add empty commands from Python REPL to history
-        if self.terminal.mode != 'python':
-             self.append_output(command + "\n", tag="white", end="")
+        if mode != 'python':
+             append(command + "\n", tag="white", end="")
         else:
-             self.append_output("\n", tag="white", end="")
+             append("\n", tag="white", end="")
 
 
         # Special handling for UI commands that work in any mode
-        if command.lower() == "theme":
-            output = self.toggle_theme()
-            self.append_output(output + "\n", tag="green")
+        ui_command = self._ui_commands.get(command.lower())
+        if ui_command:
+            output = ui_command()
+            append(output + "\n", tag="green")
             self.input_box.delete("1.0", tk.END)
             self.show_prompt()
             self.adjust_input_height()
             return
             
-        if self.terminal.mode == 'shell' and not command:
+        if mode == 'shell' and not command:
             self.show_prompt()
             return
 
-        if self.terminal.mode == 'shell':
+        if mode == 'shell':
             self.history.append(command)
             self.history_index = len(self.history)
 
-        output = self.terminal.execute_command(command)
+        self._command_running = True
+        self.input_box.configure(state='disabled')
+        self._future = self._executor.submit(self.terminal.execute_command, command)
+        self._future.add_done_callback(self._results.put)
+        self.master.after(RESULT_POLL_MS, self._poll_result)
+
+    def _poll_result(self):
+        """Hand a finished command to _on_command_done, or check again later."""
+        try:
+            future = self._results.get_nowait()
+        except queue.Empty:
+            self.master.after(RESULT_POLL_MS, self._poll_result)
+            return
+        self._on_command_done(future)
+
+    def on_close(self):
+        """Drop any queued command and close the window."""
+        # Cancelled by hand: shutdown(cancel_futures=True) needs Python 3.9
+        if self._future is not None:
+            self._future.cancel()
+        self._executor.shutdown(wait=False)
+        self.master.destroy()
+
+    def _on_command_done(self, future):
+        """Show a finished command's output; runs on the Tk thread."""
+        try:
+            output = future.result()
+        except Exception as e:
+            output = f"Error: {str(e)}"
 
         if output == "EXIT":
             self.append_output("Goodbye!", tag="red")
+            self._executor.shutdown(wait=False)
             self.master.after(500, self.master.quit)
             return
         
         if output: # Only print if there is output
-            tag = "red" if any(err in output for err in ["Error:", "No such file", "invalid"]) else "white"
+            tag = "red" if ERROR_RE.search(output) else "white"
+            if len(output) > STREAM_THRESHOLD:
+                self._stream_output(output + "\n", tag, 0)
+                return
             self.append_output(output + "\n", tag=tag)
 
+        self._finish_command()
+
+    def _stream_output(self, text, tag, start):
+        """Write one slice of a large output, then wait for Tk to go idle
+        again before the next, so the window keeps painting and responding."""
+        stop = start + STREAM_CHUNK_SIZE
+        self.append_output(text[start:stop], tag=tag, end="")
+        if stop < len(text):
+            self.master.after_idle(self._stream_output, text, tag, stop)
+        else:
+            self._finish_command()
+
+    def _finish_command(self):
+        """Give the input back and show a fresh prompt."""
+        self._command_running = False
+        self.input_box.configure(state='normal')
         self.input_box.delete("1.0", tk.END)
         self.show_prompt()
         self.adjust_input_height()
 
     def append_output(self, text, tag="white", end="\n"):
-        self.output_box.configure(state='normal')
-        start_index = self.output_box.index(tk.END + "-1c")
-        self.output_box.insert(tk.END, text + end)
-        end_index = self.output_box.index(tk.END + "-1c")
-        if start_index != end_index: # Only add tag if text was actually inserted
-            self.output_box.tag_add(tag, start_index, end_index)
-        self.output_box.see(tk.END)
-        self.output_box.configure(state='disabled')
+        """Queue text for the output box; writes made before Tk goes idle
+        are coalesced into a single update."""
+        self._pending.append((text + end, tag))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.master.after_idle(self._flush_output)
+
+    def _flush_output(self):
+        """Write all queued output with one insert and one tag_add per tag."""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        text = "".join(chunk for chunk, _ in pending)
+        if not text:
+            return
+
+        self._ob_config(state='normal')
+
+        # Only follow new output if the view was already at the bottom, so a
+        # user reading back through the scrollback isn't yanked away
+        follow = self.output_box.yview()[1] >= 0.999
+
+        # Work out each write's range from the tracked end position
+        line, col = self._end_line, self._end_col
+        ranges = {}
+        for chunk, tag in pending:
+            if not chunk: # Only tag text that was actually inserted
+                continue
+            begin = f"{line}.{col}"
+            newlines = chunk.count("\n")
+            if newlines:
+                line += newlines
+                col = tk_len(chunk[chunk.rfind("\n") + 1:])
+            else:
+                col += tk_len(chunk)
+            # "white" is the widget's own foreground, so plain text needs no tag
+            if tag != "white":
+                ranges.setdefault(tag, []).extend((begin, f"{line}.{col}"))
+
+        self._ob_insert(tk.END, text)
+        for tag, indices in ranges.items():
+            self._ob_tag_add(tag, *indices)
+
+        # Cap the scrollback, trimming the oldest lines in a single delete
+        if line - 1 > MAX_SCROLLBACK_LINES:
+            trim = line - 1 - MAX_SCROLLBACK_LINES
+            self.output_box.delete("1.0", f"{trim + 1}.0")
+            line -= trim
+        self._end_line, self._end_col = line, col
+
+        if follow:
+            self._ob_see(tk.END)
+        self._ob_config(state='disabled')
 
     def history_up(self, event):
         if self.terminal.mode == 'shell' and self.history:
@@ -320,6 +399,12 @@ class TerminalUI:
             self.adjust_input_height()
         return "break"
 
+def tk_len(text):
+    """Length of text in Tk text index units."""
+    if text.isascii() or not NON_BMP_EXTRA:
+        return len(text)
+    return len(text) + NON_BMP_EXTRA * len(NON_BMP_RE.findall(text))
+
 def main():
     root = tk.Tk()
     app = TerminalUI(root)